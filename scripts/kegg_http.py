@@ -0,0 +1,303 @@
+import aiohttp
+from aiolimiter import AsyncLimiter
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple, Union
+import weakref
+import requests
+from requests.adapters import HTTPAdapter, Retry
+
+# KEGG REST endpoint
+KEGG_REST_URL = "https://rest.kegg.jp"
+
+# Errors raised when KEGG cannot be reached or answers with an HTTP error
+REQUEST_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, requests.RequestException)
+
+# KEGG accepts up to 10 entries per "get" request
+KEGG_BATCH_SIZE = 10
+
+# Token bucket for asynchronous requests: bursts of up to 10 requests, 10 per second on average
+KEGG_MAX_RATE = 10
+KEGG_RATE_PERIOD = 1.0
+
+# On-disk cache of KEGG responses, keyed by URL
+CACHE_PATH = os.environ.get(
+    "KEGG_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".kegg_cache.sqlite")
+)
+
+# Single pooled session so TCP/TLS connections are reused across requests
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=3, backoff_factor=0.3)
+))
+
+_CONNECTION: Optional[sqlite3.Connection] = None
+
+# Parsed entries kept in memory, keyed by path (e.g. "rn:R00256"), least recently used first
+KEGG_MEMO_SIZE = 8192
+_ENTRIES: "OrderedDict[str, KeggEntry]" = OrderedDict()
+
+# AsyncLimiter must not be shared between event loops, so keep one per loop
+_LIMITERS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncLimiter]" = weakref.WeakKeyDictionary()
+
+# -------------------
+# Cache helpers
+# -------------------
+
+def _connect() -> sqlite3.Connection:
+    """Open the cache database, creating the table on first use"""
+    global _CONNECTION
+    if _CONNECTION is None:
+        _CONNECTION = sqlite3.connect(CACHE_PATH)
+        _CONNECTION.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, body BLOB, fetched_at REAL)"
+        )
+    return _CONNECTION
+
+def lookup(url: str) -> Optional[str]:
+    """Return the cached body for a URL, or None on a cache miss"""
+    row = _connect().execute(
+        "SELECT body FROM responses WHERE url = ?", (url,)
+    ).fetchone()
+    return row[0] if row else None
+
+def store(url: str, body: str) -> None:
+    """Store a response body in the cache"""
+    connection = _connect()
+    with connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO responses (url, body, fetched_at) VALUES (?, ?, ?)",
+            (url, body, time.time())
+        )
+
+def invalidate(max_age_days: float) -> int:
+    """Remove cached responses older than max_age_days and return how many were dropped"""
+    cutoff = time.time() - max_age_days * 86400
+    connection = _connect()
+    with connection:
+        cursor = connection.execute(
+            "DELETE FROM responses WHERE fetched_at < ?", (cutoff,)
+        )
+    # Entries memoized in memory may be among the removed ones
+    clear_memo()
+    return cursor.rowcount
+
+# -------------------
+# KEGG entries
+# -------------------
+
+def parse_kegg_entry(text: str) -> Dict[str, str]:
+    """Split a KEGG flat-file entry into {section_name: body} in a single pass"""
+    # Section names occupy columns 0-11 and their content starts at column 12;
+    # continuation lines are indented, e.g.
+    # "GENE        122622  ADSS1; adenylosuccinate synthase 1 [KO:K01939] [EC:6.3.4.4]"
+    # "            318  NUDT2; nudix hydrolase 2 [KO:K01518] [EC:3.6.1.17]"
+    sections: Dict[str, List[str]] = {}
+    current = None
+    for line in text.splitlines():
+        if line.startswith("///"):
+            break
+        if line[:1].isupper():
+            current = line[:12].strip()
+            sections.setdefault(current, [])
+        if current is not None:
+            sections[current].append(line[12:])
+    return {name: "\n".join(lines) for name, lines in sections.items()}
+
+# Not slotted: cached_property stores the parsed sections in the instance __dict__
+@dataclass
+class KeggEntry:
+    """Class to store the text of a KEGG entry, with its sections parsed on first access"""
+    text: str
+
+    @cached_property
+    def sections(self) -> Dict[str, str]:
+        return parse_kegg_entry(self.text)
+
+    def __repr__(self):
+        entry_line = self.text.partition("\n")[0]
+        return f"KeggEntry({entry_line})"
+
+def _recall(path: str) -> Optional[KeggEntry]:
+    """Return the memoized entry for a path, or None on a memo miss"""
+    entry = _ENTRIES.get(path)
+    if entry is not None:
+        _ENTRIES.move_to_end(path)
+    return entry
+
+def _remember(path: str, entry: KeggEntry) -> KeggEntry:
+    """Memoize an entry, dropping the least recently used one beyond KEGG_MEMO_SIZE"""
+    _ENTRIES[path] = entry
+    _ENTRIES.move_to_end(path)
+    if len(_ENTRIES) > KEGG_MEMO_SIZE:
+        _ENTRIES.popitem(last=False)
+    return entry
+
+def clear_memo() -> None:
+    """Drop every entry memoized in memory"""
+    _ENTRIES.clear()
+
+# -------------------
+# KEGG REST access
+# -------------------
+
+def _request(url: str) -> str:
+    """Issue a GET request through the pooled session"""
+    response = _SESSION.get(url, timeout=30)
+    response.raise_for_status()
+    return response.text
+
+def get(endpoint: str) -> str:
+    """Return the body of a KEGG REST endpoint (e.g. "get/ec:1.1.1.1"), using the cache"""
+    url = f"{KEGG_REST_URL}/{endpoint}"
+    body = lookup(url)
+    if body is None:
+        body = _request(url)
+        store(url, body)
+    return body
+
+def kegg_get(path: str) -> KeggEntry:
+    """Return a KEGG entry (e.g. "ec:1.1.1.1", "rn:R00256", "hsa00010")
+
+    Entries are memoized in memory before the cache is consulted, so repeated
+    reads skip the SQLite lookup and their sections are parsed at most once;
+    long-running callers can drop them with clear_memo()
+    """
+    entry = _recall(path)
+    if entry is None:
+        entry = _remember(path, KeggEntry(get(f"get/{path}")))
+    return entry
+
+def kegg_list(path: str) -> str:
+    """Return a KEGG list (e.g. "pathway", "organism", "pathway/hsa")"""
+    return get(f"list/{path}")
+
+def kegg_info(database: str) -> str:
+    """Return release information of a KEGG database (e.g. "kegg", "pathway")"""
+    return get(f"info/{database}")
+
+def _limiter() -> AsyncLimiter:
+    """Return the rate limiter of the running event loop"""
+    loop = asyncio.get_running_loop()
+    if loop not in _LIMITERS:
+        _LIMITERS[loop] = AsyncLimiter(max_rate=KEGG_MAX_RATE, time_period=KEGG_RATE_PERIOD)
+    return _LIMITERS[loop]
+
+async def _request_async(
+    session: aiohttp.ClientSession,
+    url: str,
+    semaphore: asyncio.Semaphore
+) -> str:
+    """Issue a GET request, bounded by the shared semaphore and rate limit"""
+    async with semaphore, _limiter():
+        async with session.get(url) as response:
+            response.raise_for_status()
+            return await response.text()
+
+async def fetch(
+    session: aiohttp.ClientSession,
+    path: str,
+    semaphore: asyncio.Semaphore
+) -> KeggEntry:
+    """Asynchronous counterpart of kegg_get(), sharing its in-memory memo"""
+    entry = _recall(path)
+    if entry is not None:
+        return entry
+    url = f"{KEGG_REST_URL}/get/{path}"
+    # Cache hits neither wait for the semaphore nor consume rate-limit tokens
+    body = lookup(url)
+    if body is None:
+        body = await _request_async(session, url, semaphore)
+        store(url, body)
+    return _remember(path, KeggEntry(body))
+
+# -------------------
+# Batched KEGG entries
+# -------------------
+
+def _entry_id(entry: str) -> str:
+    """Return the ID on the ENTRY line of a KEGG entry"""
+    # Examples: "ENTRY       R00256                      Reaction"
+    #           "ENTRY       EC 6.3.5.4                  Enzyme"
+    fields = entry.partition("\n")[0].split()
+    if len(fields) > 2 and fields[1] == "EC":
+        return fields[2]
+    return fields[1] if len(fields) > 1 else ""
+
+def _store_entries(prefix: str, text: str) -> Dict[str, KeggEntry]:
+    """Split a multi-entry response on "///" and cache each entry under its own URL"""
+    entries = {}
+    for entry in text.split("///\n"):
+        if not entry.strip():
+            continue
+        entry_id = _entry_id(entry)
+        body = entry + "///\n"
+        store(f"{KEGG_REST_URL}/get/{prefix}:{entry_id}", body)
+        entries[entry_id] = _remember(f"{prefix}:{entry_id}", KeggEntry(body))
+    return entries
+
+def _split_cached(prefix: str, ids: List[str]) -> Tuple[Dict[str, KeggEntry], List[List[str]]]:
+    """Return the memoized or cached entries and the remaining IDs grouped into batches"""
+    cached = {}
+    missing = []
+    for entry_id in dict.fromkeys(ids):
+        path = f"{prefix}:{entry_id}"
+        # The in-memory memo keeps parsed sections; SQLite is read only on a memo miss
+        entry = _recall(path)
+        if entry is None:
+            body = lookup(f"{KEGG_REST_URL}/get/{path}")
+            if body is None:
+                missing.append(entry_id)
+                continue
+            entry = _remember(path, KeggEntry(body))
+        cached[entry_id] = entry
+    batches = [missing[i:i + KEGG_BATCH_SIZE] for i in range(0, len(missing), KEGG_BATCH_SIZE)]
+    return cached, batches
+
+def _batch_url(prefix: str, batch: List[str]) -> str:
+    """Build the URL requesting several entries at once (e.g. ".../get/rn:R00256+rn:R01579")"""
+    return f"{KEGG_REST_URL}/get/" + "+".join(f"{prefix}:{entry_id}" for entry_id in batch)
+
+def kegg_get_many(prefix: str, ids: List[str]) -> Dict[str, KeggEntry]:
+    """Return KEGG entries keyed by ID, requesting up to KEGG_BATCH_SIZE IDs per call"""
+    entries, batches = _split_cached(prefix, ids)
+    for batch in batches:
+        entries.update(_store_entries(prefix, _request(_batch_url(prefix, batch))))
+    return entries
+
+async def fetch_many(
+    session: aiohttp.ClientSession,
+    prefix: str,
+    ids: List[str],
+    semaphore: asyncio.Semaphore
+) -> Dict[str, Union[KeggEntry, Exception]]:
+    """Asynchronous counterpart of kegg_get_many(); batches are requested concurrently
+
+    Each ID maps to its entry, or to the request error raised for its batch
+    (LookupError when KEGG returned no entry for it); other errors propagate
+    """
+    entries: Dict[str, Union[KeggEntry, Exception]] = {}
+    cached, batches = _split_cached(prefix, ids)
+    entries.update(cached)
+
+    tasks = [_request_async(session, _batch_url(prefix, batch), semaphore) for batch in batches]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    for batch, result in zip(batches, results):
+        if isinstance(result, REQUEST_ERRORS):
+            entries.update(dict.fromkeys(batch, result))
+            continue
+        if isinstance(result, BaseException):
+            raise result
+        received = _store_entries(prefix, result)
+        for entry_id in batch:
+            entries[entry_id] = received.get(entry_id, LookupError(f"no KEGG entry for {prefix}:{entry_id}"))
+    return entries
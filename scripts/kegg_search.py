@@ -1,24 +1,42 @@
-from Bio.KEGG import REST
+import aiohttp
+import argparse
+import asyncio
+import csv
+from io import StringIO
+import logging
 import pandas as pd
-from typing import DefaultDict, Tuple, List, Optional
+from typing import DefaultDict, Dict, Tuple, List, Optional, Union
 from dataclasses import dataclass, field
 import re
-import time
+import warnings
+import kegg_http
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of in-flight requests to KEGG
+KEGG_MAX_CONCURRENCY = 5
+
+# Precompiled patterns for parsing KEGG entries
+_EC_RE = re.compile(r'\[EC:([\d\.\s]+)\]')            # [EC:1.2.3.4] or [EC:1.2.3.4 1.2.3.5]
+_KO_RE = re.compile(r'\[KO:([^\]]+)\]')                # [KO:K12345]
+_RN_ID_RE = re.compile(r'R\d+')                        # R00256
+_REACTION_RE = re.compile(r'(.+)\s+\[RN:([^\]]+)\]')    # ... = L-glutamate + NH3 [RN:R00256]
 
 # -------------------
 # Classes
 # -------------------
 
-@dataclass
+@dataclass(slots=True)
 class GeneralKegg:
     """Class to store KEGG pathway and organism data"""
     pathway_df: pd.DataFrame
     organism_df: pd.DataFrame
+    abbrev_index: Dict[str, str] = field(default_factory=dict)
     
     def __repr__(self):
         return f"GeneralKegg(pathway_df shape: {self.pathway_df.shape}, organism_df shape: {self.organism_df.shape})"
 
-@dataclass
+@dataclass(slots=True)
 class ReactionData:
     """Class to store reaction-related information"""
     reaction_id: str
@@ -31,7 +49,7 @@ class ReactionData:
     def __repr__(self):
         return f"ReactionData({self.reaction_id}: {self.reaction_equation})"
 
-@dataclass
+@dataclass(slots=True)
 class EnzymeData:
     """Class to store enzyme-related information"""
     enzyme_name: str
@@ -47,7 +65,7 @@ class EnzymeData:
     def __repr__(self):
         return f"EnzymeData(gene: {self.gene}, EC: {self.ec_numbers}, reactions: {len(self.reaction_data)})"
 
-@dataclass
+@dataclass(slots=True)
 class PathwayData:
     """Class to store pathway-related information"""
     pathway_name: str
@@ -58,7 +76,7 @@ class PathwayData:
     def __repr__(self):
         return f"PathwayData(name: {self.pathway_name}, enzymes: {len(self.enzymes)})"
 
-@dataclass
+@dataclass(slots=True)
 class OrganismData:
     """Class to store associated pathways to a specific organism"""
     organism_name: str
@@ -72,39 +90,55 @@ class OrganismData:
 # 1. Collect KEGG complete data
 # -------------------
 
+def read_kegg_list(text: str, columns: List[str]) -> pd.DataFrame:
+    """Parse a tab-separated KEGG list response into a DataFrame in one pass"""
+    if not text.strip():
+        return pd.DataFrame(columns=columns)
+    # Rows with a different number of fields are dropped. Values are kept as
+    # strings, so identifiers such as "NA" or "nan" are not read as missing
+    # An extra "_overflow" column catches rows with one field too many; longer
+    # rows are skipped by the parser, except a first row, which index_col=False
+    # truncates (with a ParserWarning) instead of shifting it into the index
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", pd.errors.ParserWarning)
+        list_df = pd.read_csv(
+            StringIO(text),
+            sep="\t",
+            header=None,
+            names=columns + ["_overflow"],
+            index_col=False,
+            dtype=str,
+            keep_default_na=False,
+            na_values=[""],
+            quoting=csv.QUOTE_NONE,
+            on_bad_lines="skip"
+        )
+    list_df = list_df[list_df["_overflow"].isna()].drop(columns="_overflow")
+    return list_df.dropna().reset_index(drop=True)
+
 def collect_kegg() -> GeneralKegg:
     '''Collect complete KEGG data from API and return GeneralKegg object'''
     # Print general information
-    gen_info = REST.kegg_info("kegg").read()
+    gen_info = kegg_http.kegg_info("kegg")
     print("="*50)
     print("General KEGG information:\n\n")
     print(gen_info)
     print("="*50)
 
     print("Retrieving pathways from KEGG...")
-    pathways = REST.kegg_list("pathway").read()
-    path_df = pd.DataFrame(columns=["kegg_id", "pathway_name"])
-    for line in pathways.split("\n"):
-        if len(line.split("\t")) != 2:
-            continue
-        path_id, path_name = line.split("\t")
-        path_df.loc[len(path_df)] = [path_id, path_name]
+    pathways = kegg_http.kegg_list("pathway")
+    path_df = read_kegg_list(pathways, ["kegg_id", "pathway_name"])
     print(f"Total pathways retrieved: {path_df.shape}\n")
 
     print("Retrieving organisms from KEGG...")
-    organisms = REST.kegg_list("organism").read()
-    parts = organisms.split("\n")
-    # Filter out empty lines and only process non-empty ones
-    non_empty_parts = [line for line in parts if line.strip() and len(line.split("\t")) == 4]
-
-    org_df = pd.DataFrame(columns=["kegg_id", "abbreviation", "organism", "taxonomy"])
-    for line in non_empty_parts:
-        kegg_id, abbr, org, tax = line.split("\t")
-        org_df.loc[len(org_df)] = [kegg_id, abbr, org, tax]
+    organisms = kegg_http.kegg_list("organism")
+    org_df = read_kegg_list(organisms, ["kegg_id", "abbreviation", "organism", "taxonomy"])
     print(f"Total organisms retrieved: {org_df.shape}")
     
     # Create and return the class instance
     kegg_data = GeneralKegg(pathway_df=path_df, organism_df=org_df)
+    # Index organism names by abbreviation for constant-time lookups
+    kegg_data.abbrev_index = dict(zip(org_df["abbreviation"], org_df["organism"]))
     return kegg_data
 
 # -------------------
@@ -120,20 +154,10 @@ def retrieve_organism_pathways(
     print(f"Retrieving pathways for organism: {abbr}")
 
     # Get organism name from general data
-    org_row = general_data.organism_df[general_data.organism_df['abbreviation'] == abbr]
-    if org_row.empty:
-        organism_name = abbr
-    else:
-        organism_name = org_row.iloc[0]['organism']
+    organism_name = general_data.abbrev_index.get(abbr, abbr)
     
-    pathways = REST.kegg_list(f"pathway/{abbr}").read()
-
-    pathway_df = pd.DataFrame(columns=["kegg_id", "pathway_name"])
-
-    for line in pathways.strip().split("\n"):
-        if line and "\t" in line:
-            pathway_id, pathway_name = line.split("\t")
-            pathway_df.loc[len(pathway_df)] = [pathway_id, pathway_name]
+    pathways = kegg_http.kegg_list(f"pathway/{abbr}")
+    pathway_df = read_kegg_list(pathways, ["kegg_id", "pathway_name"])
     print(f"Total pathways retrieved from {abbr}: {pathway_df.shape}")
 
     return OrganismData(
@@ -148,26 +172,22 @@ def retrieve_organism_pathways(
 
 def parse_ec_numbers(text: str) -> List[str]:
     """Extract EC numbers from text"""
-    # Pattern for EC numbers: [EC:1.2.3.4] or [EC:1.2.3.4 1.2.3.5]
-    ec_pattern = r'\[EC:([\d\.\s]+)\]'
-    matches = re.findall(ec_pattern, text)
+    matches = _EC_RE.findall(text)
     if matches:
         # Split multiple EC numbers by space and clean
         ec_numbers = []
         for match in matches:
-            ec_numbers.extend([ec.strip() for ec in match.split() if ec.strip()])
+            ec_numbers.extend(match.split())
         return ec_numbers
     return []
 
 def parse_ko_numbers(text: str) -> List[str]:
     """Extract KO numbers from text"""
-    # Pattern for KO numbers: [KO:K12345]
-    ko_pattern = r'\[KO:([^\]]+)\]'
-    matches = re.findall(ko_pattern, text)
+    matches = _KO_RE.findall(text)
     if matches:
         ko_numbers = []
         for match in matches:
-            ko_numbers.extend([ko.strip() for ko in match.split() if ko.strip()])
+            ko_numbers.extend(match.split())
         return ko_numbers
     return []
 
@@ -180,33 +200,30 @@ def parse_gene_line(line: str, organism_abbr: str) -> Optional[EnzymeData]:
     # KEGG GENE line format: "gene_id  gene_symbol; description [KO:...] [EC:...]"
     # Example: "122622  ADSS1; adenylosuccinate synthase 1 [KO:K01939] [EC:6.3.4.4]"
     
-    # Split by multiple spaces to separate gene ID from the rest
-    parts = re.split(r'\s{2,}', line)  # Split by 2 or more spaces
-    if len(parts) < 2:
+    # The gene ID ends at the first run of 2 or more spaces
+    gene_id, _, rest_of_line = line.partition('  ')
+    rest_of_line = rest_of_line.lstrip()
+    if not rest_of_line:
         return None
     
-    gene_id = parts[0].strip()
-    rest_of_line = parts[1].strip()
+    # Everything from the first [ on holds the KO/EC annotations
+    description, bracket, annotations = rest_of_line.partition('[')
+    annotations = bracket + annotations
     
     # Extract gene symbol and enzyme name
-    if ';' in rest_of_line:
-        gene_symbol = rest_of_line.split(';')[0].strip()
-        enzyme_name = rest_of_line.split(';')[1].strip()
-        
-        # Remove everything after [ to get clean enzyme name
-        if '[' in enzyme_name:
-            enzyme_name = enzyme_name.split('[')[0].strip()
+    gene_symbol, separator, enzyme_name = description.partition(';')
+    if separator:
+        gene_symbol = gene_symbol.strip()
+        enzyme_name = enzyme_name.strip()
     else:
         gene_symbol = rest_of_line
-        enzyme_name = rest_of_line
-        if '[' in enzyme_name:
-            enzyme_name = enzyme_name.split('[')[0].strip()
+        enzyme_name = description.strip()
     
     # Extract EC numbers
-    ec_numbers = parse_ec_numbers(rest_of_line)
+    ec_numbers = parse_ec_numbers(annotations)
     
     # Extract KO numbers
-    ko_numbers = parse_ko_numbers(rest_of_line)
+    ko_numbers = parse_ko_numbers(annotations)
     
     # Create full KEGG gene ID
     kegg_gene_id = f"{organism_abbr}:{gene_id}"
@@ -223,122 +240,126 @@ def parse_gene_line(line: str, organism_abbr: str) -> Optional[EnzymeData]:
 # 3. Helper functions for parsing data from enzymes
 # -------------------
 
-def parse_all_reac_line(all_reac_line: str) -> List[ReactionData]:
+def parse_all_reac_line(all_reac_line: str) -> List[str]:
     """Parse ALL_REAC line to get reaction IDs"""
     # Example: "R00256; (other) R01579 R06134"
-    reaction_data = []
-    
-    # Extract all reaction IDs
-    reaction_ids = re.findall(r'R\d+', all_reac_line)
+    return _RN_ID_RE.findall(all_reac_line)
+
+def split_equation(equation: str) -> Tuple[List[str], List[str]]:
+    """Split a reaction equation into its left and right side terms"""
+    # KEGG reaction entries use " <=> ", EC entries use " = "
+    for separator in (' <=> ', ' = '):
+        left_str, found, right_str = equation.partition(separator)
+        if found:
+            left = [term.strip() for term in left_str.split(' + ')]
+            right = [term.strip() for term in right_str.split(' + ')]
+            return left, right
+    return [], []
+
+def get_compound(compound_id: str, compound_entries: Dict[str, kegg_http.KeggEntry]) -> str:
+    """Describe a compound as "name [C00001]" from its already fetched KEGG entry"""
+    if compound_id not in compound_entries:
+        return compound_id
+    sections = compound_entries[compound_id].sections
+    compound_name = sections.get("NAME", "").partition("\n")[0].strip().rstrip(';')
+    return f"{compound_name} [{compound_id}]" if compound_name else compound_id
+
+def reaction_formulas(reaction_entry: kegg_http.KeggEntry) -> Tuple[str, str]:
+    """Return the first lines of the EQUATION and DEFINITION sections of a reaction"""
+    sections = reaction_entry.sections
+    equation = sections.get("EQUATION", "").strip().partition("\n")[0].strip()
+    definition = sections.get("DEFINITION", "").strip().partition("\n")[0].strip()
+    return equation, definition
+
+def definition_names(equation: str, definition: str) -> Dict[str, str]:
+    """Map compound IDs of an EQUATION to their names in DEFINITION"""
+    # Example: "C00064 + C00001 <=> C00025 + C00014"
+    #          "L-Glutamine + H2O <=> L-Glutamate + Ammonia"
+    substrate_terms, product_terms = split_equation(equation)
+    substrate_names, product_names = split_equation(definition)
+
+    # Both sides list the same compounds in the same order, with the same
+    # coefficients (e.g. "2 C00001" / "2 H2O")
+    compound_names = {}
+    if len(substrate_terms) == len(substrate_names) and len(product_terms) == len(product_names):
+        for term, name in zip(substrate_terms + product_terms, substrate_names + product_names):
+            coefficient, _, compound_id = term.rpartition(' ')
+            if coefficient and name.startswith(coefficient + ' '):
+                name = name[len(coefficient) + 1:]
+            compound_names[compound_id] = name
+    return compound_names
+
+def unnamed_compounds(equation: str, definition: str) -> List[str]:
+    """Return the compound IDs of an EQUATION that DEFINITION does not name"""
+    substrate_terms, product_terms = split_equation(equation)
+    compound_names = definition_names(equation, definition)
+    compound_ids = [term.rpartition(' ')[2] for term in substrate_terms + product_terms]
+    return [compound_id for compound_id in compound_ids if compound_id not in compound_names]
+
+def parse_equation_compounds(
+    equation: str,
+    definition: str,
+    compound_entries: Dict[str, kegg_http.KeggEntry]
+) -> Tuple[List[str], List[str]]:
+    """Map compound IDs of an EQUATION to "name [ID]" using the names in DEFINITION"""
+    substrate_terms, product_terms = split_equation(equation)
+    compound_names = definition_names(equation, definition)
+
+    # Fall back to the compound entries when DEFINITION does not line up
+    def describe(term: str) -> str:
+        compound_id = term.rpartition(' ')[2]
+        if compound_id in compound_names:
+            return f"{compound_names[compound_id]} [{compound_id}]"
+        return get_compound(compound_id, compound_entries)
+
+    return [describe(term) for term in substrate_terms], [describe(term) for term in product_terms]
+
+def build_reaction_data(
+    reaction_id: str,
+    reaction_entry: kegg_http.KeggEntry,
+    *,
+    include_compounds: bool = False,
+    compound_entries: Optional[Dict[str, kegg_http.KeggEntry]] = None
+) -> ReactionData:
+    """Build ReactionData from the KEGG entry of a reaction
+
+    Compounds that DEFINITION does not name are read from compound_entries,
+    which must already hold their entries (see unnamed_compounds())
+    """
+    equation, definition = reaction_formulas(reaction_entry)
     
-    for reaction_id in reaction_ids:
-        try:
-            # Get detailed reaction information
-            reaction_info = REST.kegg_get(f"rn:{reaction_id}").read()
-            
-            # Parse EQUATION section directly
-            equation = ""
-            if "EQUATION" in reaction_info:
-                eq_start = reaction_info.find("EQUATION")
-                if eq_start != -1:
-                    remaining_text = reaction_info[eq_start + len("EQUATION"):]
-                    next_section_match = re.search(r'\n[A-Z]+\s', remaining_text)
-                    if next_section_match:
-                        eq_section = remaining_text[:next_section_match.start()]
-                    else:
-                        eq_section = remaining_text
-                    
-                    # Get the first line of EQUATION section
-                    equation_lines = eq_section.strip().split("\n")
-                    if equation_lines:
-                        equation = equation_lines[0].strip()
-            
-            # Parse substrates and products from equation
-            substrates = []
-            products = []
-            substrate_compounds = []
-            product_compounds = []
-            
-            if ' = ' in equation:
-                substrates_str, products_str = equation.split(' = ', 1)
-                substrates = [s.strip() for s in substrates_str.split(' + ')]
-                products = [p.strip() for p in products_str.split(' + ')]
-            
-            # Extract compound information from SUBSTRATE and PRODUCT sections
-            if "SUBSTRATE" in reaction_info:
-                substrate_start = reaction_info.find("SUBSTRATE")
-                if substrate_start != -1:
-                    remaining_text = reaction_info[substrate_start + len("SUBSTRATE"):]
-                    next_section_match = re.search(r'\n[A-Z]+\s', remaining_text)
-                    if next_section_match:
-                        substrate_section = remaining_text[:next_section_match.start()]
-                    else:
-                        substrate_section = remaining_text
-                    
-                    for line in substrate_section.split("\n"):
-                        line = line.strip()
-                        if line:
-                            compound_info = parse_compound_line(line)
-                            if compound_info:
-                                substrate_compounds.append(compound_info)
-            
-            if "PRODUCT" in reaction_info:
-                product_start = reaction_info.find("PRODUCT")
-                if product_start != -1:
-                    remaining_text = reaction_info[product_start + len("PRODUCT"):]
-                    next_section_match = re.search(r'\n[A-Z]+\s', remaining_text)
-                    if next_section_match:
-                        product_section = remaining_text[:next_section_match.start()]
-                    else:
-                        product_section = remaining_text
-                    
-                    for line in product_section.split("\n"):
-                        line = line.strip()
-                        if line:
-                            compound_info = parse_compound_line(line)
-                            if compound_info:
-                                product_compounds.append(compound_info)
-                
-            reaction_data.append(ReactionData(
-                reaction_id=reaction_id,
-                reaction_equation=equation,
-                substrates=substrates,
-                products=products,
-                substrate_compounds=substrate_compounds,
-                product_compounds=product_compounds
-            ))
-                
-        except Exception as e:
-            print(f"Error retrieving reaction {reaction_id}: {e}")
+    # Parse substrates and products from equation
+    substrates, products = split_equation(equation)
     
-    return reaction_data
-
-def parse_compound_line(compound_line: str) -> str:
-    """Parse compound line to extract compound information"""
-    # Example: "L-glutamine [CPD:C00064]"
-    compound_match = re.match(r'(.+?)\s+\[CPD:([^\]]+)\]', compound_line)
-    if compound_match:
-        compound_name = compound_match.group(1).strip()
-        compound_id = compound_match.group(2).strip()
-        return f"{compound_name} [{compound_id}]"
-    return compound_line.strip()
+    # Reaction entries have no SUBSTRATE/PRODUCT sections, so compound
+    # information is taken from the equation itself (only when requested,
+    # as it may need extra requests for compound names)
+    substrate_compounds = []
+    product_compounds = []
+    if include_compounds:
+        substrate_compounds, product_compounds = parse_equation_compounds(
+            equation, definition, compound_entries or {}
+        )
+        
+    return ReactionData(
+        reaction_id=reaction_id,
+        reaction_equation=equation,
+        substrates=substrates,
+        products=products,
+        substrate_compounds=substrate_compounds,
+        product_compounds=product_compounds
+    )
 
 def parse_reaction_line(reaction_line: str) -> Optional[ReactionData]:
     """Parse a REACTION line from KEGG EC entry"""
     # Example: "L-glutamine + H2O = L-glutamate + NH3 [RN:R00256]"
-    reaction_match = re.match(r'(.+)\s+\[RN:([^\]]+)\]', reaction_line)
+    reaction_match = _REACTION_RE.match(reaction_line)
     if reaction_match:
         equation = reaction_match.group(1).strip()
         reaction_id = reaction_match.group(2).strip()
         
         # Parse equation to get substrates and products
-        if ' = ' in equation:
-            substrates_str, products_str = equation.split(' = ', 1)
-            substrates = [s.strip() for s in substrates_str.split(' + ')]
-            products = [p.strip() for p in products_str.split(' + ')]
-        else:
-            substrates = []
-            products = []
+        substrates, products = split_equation(equation)
         
         return ReactionData(
             reaction_id=reaction_id,
@@ -352,87 +373,120 @@ def parse_reaction_line(reaction_line: str) -> Optional[ReactionData]:
 # 3. Get detailed information regarding an enzyme (from EC Number)
 # -------------------
 
-def retrieve_ec_information(ec_numbers: List[str]) -> List[ReactionData]:
-    """Retrieve reaction information for EC numbers"""
-    reaction_data = []
-
-    for ec_number in ec_numbers:
-        try:
-            # Get EC entry from KEGG
-            time.sleep(0.5)
-            ec_info = REST.kegg_get(f"ec:{ec_number}").read()
-
-            # Parse REACTION section directly
-            if "REACTION" in ec_info:
-                # Find REACTION section
-                reaction_start = ec_info.find("REACTION")
-                if reaction_start != -1:
-                    # Get the section after REACTION
-                    remaining_text = ec_info[reaction_start + len("REACTION"):]
-                    # Find the next section or end of file
-                    next_section_match = re.search(r'\n[A-Z]+\s', remaining_text)
-                    if next_section_match:
-                        reaction_section = remaining_text[:next_section_match.start()]
-                    else:
-                        reaction_section = remaining_text
-                    
-                    # Parse each reaction line
-                    for line in reaction_section.split("\n"):
-                        line = line.strip()
-                        if line and not line.startswith(' '):
-                            reaction_info = parse_reaction_line(line)
-                            if reaction_info:
-                                reaction_data.append(reaction_info)
+async def fetch_entries(
+    prefix: str,
+    ids: List[str],
+    session: aiohttp.ClientSession,
+    semaphore: asyncio.Semaphore
+) -> Dict[str, kegg_http.KeggEntry]:
+    """Fetch each distinct KEGG entry once, in concurrent batches, keyed by ID"""
+    results = await kegg_http.fetch_many(session, prefix, ids, semaphore)
+
+    entries = {}
+    for entry_id, result in results.items():
+        if isinstance(result, Exception):
+            logger.warning("KEGG fetch failed for %s:%s: %s", prefix, entry_id, result)
+            continue
+        entries[entry_id] = result
+    return entries
+
+async def retrieve_ec_information(
+    enzymes: List[EnzymeData],
+    session: aiohttp.ClientSession,
+    semaphore: asyncio.Semaphore,
+    *,
+    include_compounds: bool = False
+) -> None:
+    """Retrieve reaction information for the EC numbers of all enzymes"""
+    # Get every distinct EC entry once
+    ec_numbers = [ec_number for enzyme in enzymes for ec_number in enzyme.ec_numbers]
+    ec_entries = await fetch_entries("ec", ec_numbers, session, semaphore)
+
+    # Reactions from the REACTION section are complete, while ALL_REAC only
+    # gives reaction IDs that are resolved below (kept in order per enzyme)
+    enzyme_reactions: List[List[Union[ReactionData, str]]] = []
+    for enzyme in enzymes:
+        reactions: List[Union[ReactionData, str]] = []
+        for ec_number in enzyme.ec_numbers:
+            if ec_number not in ec_entries:
+                continue
+            sections = ec_entries[ec_number].sections
+
+            # Parse each line of the REACTION section
+            for line in sections.get("REACTION", "").split("\n"):
+                line = line.strip()
+                if line:
+                    reaction_info = parse_reaction_line(line)
+                    if reaction_info:
+                        reactions.append(reaction_info)
             
             # Also check for ALL_REAC if no reactions found in REACTION section
-            if not reaction_data and "ALL_REAC" in ec_info:
-                # Find ALL_REAC section
-                all_reac_start = ec_info.find("ALL_REAC")
-                if all_reac_start != -1:
-                    remaining_text = ec_info[all_reac_start + len("ALL_REAC"):]
-                    next_section_match = re.search(r'\n[A-Z]+\s', remaining_text)
-                    if next_section_match:
-                        all_reac_section = remaining_text[:next_section_match.start()]
-                    else:
-                        all_reac_section = remaining_text
-                    
-                    # Parse the ALL_REAC line(s)
-                    for line in all_reac_section.split("\n"):
-                        line = line.strip()
-                        if line:
-                            reactions_from_all_reac = parse_all_reac_line(line)
-                            if reactions_from_all_reac:
-                                reaction_data.extend(reactions_from_all_reac)
-                        
-        except Exception as e:
-            print(f"Error retrieving information for EC {ec_number}: {e}")
-    
-    return reaction_data
+            if not reactions and "ALL_REAC" in sections:
+                # Parse the ALL_REAC line(s)
+                for line in sections["ALL_REAC"].split("\n"):
+                    line = line.strip()
+                    if line:
+                        reactions.extend(parse_all_reac_line(line))
+        enzyme_reactions.append(reactions)
+
+    # Get every distinct reaction entry once, even when shared by several enzymes
+    reaction_ids = [reaction for reactions in enzyme_reactions for reaction in reactions if isinstance(reaction, str)]
+    reaction_entries = await fetch_entries("rn", reaction_ids, session, semaphore)
+
+    # Get every compound that DEFINITION does not name, so reactions are built
+    # from entries already fetched
+    compound_entries: Dict[str, kegg_http.KeggEntry] = {}
+    if include_compounds:
+        compound_ids = [
+            compound_id
+            for reaction_entry in reaction_entries.values()
+            for compound_id in unnamed_compounds(*reaction_formulas(reaction_entry))
+        ]
+        compound_entries = await fetch_entries("cpd", compound_ids, session, semaphore)
+
+    for enzyme, reactions in zip(enzymes, enzyme_reactions):
+        enzyme.reaction_data = []
+        for reaction in reactions:
+            if isinstance(reaction, ReactionData):
+                enzyme.reaction_data.append(reaction)
+            elif reaction in reaction_entries:
+                enzyme.reaction_data.append(build_reaction_data(
+                    reaction,
+                    reaction_entries[reaction],
+                    include_compounds=include_compounds,
+                    compound_entries=compound_entries
+                ))
 
 # -------------------
 # 3. Get detailed information regarding a pathway
 # (including reactions information)
 # -------------------
 
-def retrieve_pathway_info(pathway_id:str, abbr:str) -> PathwayData:
+async def retrieve_pathway_info(
+    pathway_id: str,
+    abbr: str,
+    session: aiohttp.ClientSession,
+    semaphore: asyncio.Semaphore,
+    *,
+    include_compounds: bool = False
+) -> Optional[PathwayData]:
+    """Retrieve pathway information, including the reactions of its enzymes"""
     # Retrieve information from pathway
     try:
-        pathway_info = REST.kegg_get(pathway_id).read()
+        pathway_entry = await kegg_http.fetch(session, pathway_id, semaphore)
+        sections = pathway_entry.sections
         
         # Extract pathway name properly
         pathway_name = "Unknown"
-        for line in pathway_info.split("\n"):
-            if line.startswith("NAME"):
-                pathway_name = line.replace("NAME", "").strip()
-                # Remove trailing semicolon if present
-                pathway_name = pathway_name.rstrip(';')
-                break
+        if "NAME" in sections:
+            # Remove trailing semicolon if present
+            pathway_name = sections["NAME"].partition("\n")[0].strip().rstrip(';')
         
         # Check if it's a global pathway
         global_path = False
-        first_line = pathway_info.split("\n")[0] if pathway_info else ""
+        entry_line = sections.get("ENTRY", "")
         
-        if "Global" in first_line or "Overview" in first_line:
+        if "Global" in entry_line or "Overview" in entry_line:
             global_path = True
             return PathwayData(
                 pathway_name=pathway_name, 
@@ -442,7 +496,7 @@ def retrieve_pathway_info(pathway_id:str, abbr:str) -> PathwayData:
             )
         
         # Check if pathway contains EC numbers
-        if "[EC:" not in pathway_info:
+        if "[EC:" not in pathway_entry.text:
             global_path = True
             return PathwayData(
                 pathway_name=pathway_name, 
@@ -451,31 +505,17 @@ def retrieve_pathway_info(pathway_id:str, abbr:str) -> PathwayData:
                 enzymes=[]
             )
 
-        # Parse GENE section
+        # Parse each line of the GENE section
         enzymes = []
-        if "GENE" in pathway_info:
-            # Split by GENE section and get the part after GENE
-            gene_section = pathway_info.split("GENE")[1]
-            
-            # Split by next section header or end of file
-            next_section_match = re.search(r'\n[A-Z]+\s', gene_section)
-            if next_section_match:
-                gene_lines = gene_section[:next_section_match.start()].split("\n")
-            else:
-                gene_lines = gene_section.split("\n")
-            
-            # Parse each gene line
-            for gene_line in gene_lines:
-                if gene_line.strip() and not gene_line.strip().startswith((' ', '\t')):
-                    # This is a new gene entry
-                    enzyme = parse_gene_line(gene_line, abbr)
-                    if enzyme and enzyme.ec_numbers:
-                        # Retrieve reaction information for EC numbers
-                        enzyme.reaction_data = retrieve_ec_information(enzyme.ec_numbers)
-                        enzymes.append(enzyme)
-                elif gene_line.strip() and enzymes:
-                    # This is a continuation line for the last gene
-                    pass
+        for gene_line in sections.get("GENE", "").split("\n"):
+            if gene_line.strip():
+                enzyme = parse_gene_line(gene_line, abbr)
+                if enzyme and enzyme.ec_numbers:
+                    enzymes.append(enzyme)
+        
+        # Retrieve reaction information for EC numbers of all enzymes at once
+        if enzymes:
+            await retrieve_ec_information(enzymes, session, semaphore, include_compounds=include_compounds)
         
         return PathwayData(
             pathway_name=pathway_name, 
@@ -483,16 +523,47 @@ def retrieve_pathway_info(pathway_id:str, abbr:str) -> PathwayData:
             global_path=global_path, 
             enzymes=enzymes
         )
-    except Exception as e:
-        print(f"    Error processing pathway {pathway_id}: {e}")
+    except kegg_http.REQUEST_ERRORS as e:
+        logger.warning("KEGG fetch failed for pathway %s: %s", pathway_id, e)
         # Add pathway without enzyme data
         return None
 
+async def retrieve_pathways_info(
+    pathway_ids: List[str],
+    abbr: str,
+    *,
+    include_compounds: bool = False
+) -> List[Optional[PathwayData]]:
+    """Retrieve several pathways concurrently, sharing one session and request limit"""
+    semaphore = asyncio.Semaphore(KEGG_MAX_CONCURRENCY)
+    connector = aiohttp.TCPConnector(limit=KEGG_MAX_CONCURRENCY)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        tasks = [
+            retrieve_pathway_info(pathway_id, abbr, session, semaphore, include_compounds=include_compounds)
+            for pathway_id in pathway_ids
+        ]
+        return await asyncio.gather(*tasks)
+
 # -------------------
 # Main execution
 # -------------------
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retrieve pathway and enzyme information from KEGG")
+    parser.add_argument(
+        "--refresh",
+        type=float,
+        metavar="DAYS",
+        help="Invalidate cached KEGG responses older than DAYS days"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(format="%(levelname)s: %(message)s")
+
+    if args.refresh is not None:
+        removed = kegg_http.invalidate(args.refresh)
+        print(f"Removed {removed} cached KEGG responses older than {args.refresh} days")
+
     # ----------------------------------
     # 1. Retrieve overall information from KEGG
     # ----------------------------------
@@ -523,10 +594,11 @@ if __name__ == "__main__":
         organism_data = retrieve_organism_pathways(test_organism, kegg_result)
         print(f"Retrieved data: {organism_data}")
         #print(organism_data.pathways_info.head)
-        for index, row in organism_data.pathways_info.iterrows():
-            print(f"{row['kegg_id']} - {row['pathway_name']}")
+        pathways_info = organism_data.pathways_info
+        for kegg_id, pathway_name in zip(pathways_info["kegg_id"], pathways_info["pathway_name"]):
+            print(f"{kegg_id} - {pathway_name}")
 
-        #print(REST.kegg_get("hsa01100").read())
+        #print(kegg_http.kegg_get("hsa01100"))
 
         # ----------------------------------
         # 3. Test with specific pathways
@@ -537,9 +609,10 @@ if __name__ == "__main__":
             "hsa00010"   # Glycolysis / Gluconeogenesis
         ]
 
-        for pathway_id in test_specific_pathways:
+        pathways_data = asyncio.run(retrieve_pathways_info(test_specific_pathways, "hsa"))
+
+        for pathway_id, pathway_data in zip(test_specific_pathways, pathways_data):
             print(f"\nTesting pathway: {pathway_id}")
-            pathway_data = retrieve_pathway_info(pathway_id, "hsa")
             
             if pathway_data:
                 print(f"Successfully retrieved {pathway_data.pathway_name}")